@@ -2,11 +2,19 @@ import sqlite3
 import cv2
 import numpy as np
 import os
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+import secrets
+from datetime import date
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Header, Depends
 from logic import process_frame
-from database import DB_NAME, insert_log
+from database import (DB_NAME, insert_log, resolve_log, get_authorities, get_authority,
+                      get_work_queue, get_authority_trends, archive_logs)
 from geo_utils import get_location_details, get_municipal_authority
 from fastapi.middleware.cors import CORSMiddleware
+from dotenv import load_dotenv
+
+load_dotenv()
+# Shared secret for state-changing endpoints; they are disabled if unset
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
 
 app = FastAPI(title="Smart Road Monitoring System API")
 
@@ -51,6 +59,71 @@ def get_map_data():
         print(f"Database error: {e}")
         return []
 
+@app.get("/authorities")
+def list_authorities():
+    return get_authorities()
+
+@app.get("/authorities/{authority_id}/queue")
+def authority_queue(authority_id: int, limit: int = Query(20, ge=1, le=500)):
+    authority = get_authority(authority_id)
+    if authority is None:
+        raise HTTPException(status_code=404, detail="Authority not found")
+
+    rows = get_work_queue(authority_id, limit)
+    return {
+        "authority": authority,
+        "incidents": [
+            {
+                "id": row["id"],
+                "timestamp": row["timestamp"],
+                "priority": row["priority_level"],
+                "severity": row["severity_score"],
+                "lat": row["latitude"],
+                "lon": row["longitude"],
+                "address": row["address"]
+            }
+            for row in rows
+        ]
+    }
+
+@app.get("/authorities/{authority_id}/trends")
+def authority_trends(authority_id: int, days: int = Query(30, ge=1, le=3650)):
+    authority = get_authority(authority_id)
+    if authority is None:
+        raise HTTPException(status_code=404, detail="Authority not found")
+
+    rows = get_authority_trends(authority_id, days)
+    return {
+        "authority": authority,
+        "trends": [
+            {
+                "day": row["day"],
+                "priority": row["priority_level"],
+                "reports": row["report_count"],
+                "open": row["open_count"],
+                "avg_severity": round(row["severity_sum"] / row["report_count"], 4) if row["report_count"] else 0.0,
+                "max_severity": row["severity_max"]
+            }
+            for row in rows
+        ]
+    }
+
+def require_admin_token(x_admin_token: str = Header(None)):
+    if not ADMIN_API_TOKEN or not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.post("/incidents/{incident_id}/resolve", dependencies=[Depends(require_admin_token)])
+def resolve_incident(incident_id: int):
+    if not resolve_log(incident_id):
+        raise HTTPException(status_code=404, detail="No open incident with that ID")
+    return {"status": "Resolved", "report_id": incident_id}
+
+@app.post("/admin/archive-logs", dependencies=[Depends(require_admin_token)])
+def archive_old_logs(before: date = Form(...)):
+    # Rows logged before this date are moved to archive tables
+    moved = archive_logs(before)
+    return {"status": "Archived", "partitions": moved, "rows_moved": sum(moved.values())}
+
 @app.post("/report-incident")
 async def report_incident(
     file: UploadFile = File(...),
@@ -84,7 +157,7 @@ async def report_incident(
     authority_name = get_municipal_authority(city) if has_damage else "N/A"
     
     # 5. Save to Database
-    insert_log("API Upload", file.filename, has_damage, severity, priority, save_path, 
+    report_id = insert_log("API Upload", file.filename, has_damage, severity, priority, save_path, 
                latitude, longitude, address, authority_name)
     
     return {
@@ -93,7 +166,7 @@ async def report_incident(
         "priority": priority,
         "severity": severity,
         "authority_notified": authority_name,
-        "report_id": "LOGGED"
+        "report_id": report_id
     }
 
 if __name__ == "__main__":
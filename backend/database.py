@@ -1,11 +1,30 @@
+import re
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 
 DB_NAME = "road_monitoring.db"
 
+# Authority value stored when no damage was found (no one to notify)
+NO_AUTHORITY = "N/A"
+
+# Stored in PRAGMA user_version; bump when init_db() must migrate existing data
+SCHEMA_VERSION = 1
+
 def init_db():
-    conn = sqlite3.connect(DB_NAME)
+    # Schema creation and migration are applied all-or-nothing
+    conn = sqlite3.connect(DB_NAME, isolation_level=None)
     c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        _create_schema(c)
+        c.execute("COMMIT")
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def _create_schema(c):
     # Updated table schema to include location details
     c.execute('''CREATE TABLE IF NOT EXISTS road_logs
                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -19,22 +38,291 @@ def init_db():
                   latitude REAL,
                   longitude REAL,
                   address TEXT,
-                  municipal_authority TEXT)''')
-    conn.commit()
-    conn.close()
+                  municipal_authority TEXT,
+                  authority_id INTEGER REFERENCES authorities(id),
+                  status TEXT DEFAULT 'open')''')
+
+    # Normalized authority records (one row per municipal authority) with
+    # running totals, maintained on insert/resolve alongside the rollups
+    c.execute('''CREATE TABLE IF NOT EXISTS authorities
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  name TEXT NOT NULL UNIQUE,
+                  created_at TEXT,
+                  report_count INTEGER NOT NULL DEFAULT 0,
+                  open_count INTEGER NOT NULL DEFAULT 0,
+                  severity_max REAL NOT NULL DEFAULT 0)''')
+
+    # Rollups, maintained on insert/resolve instead of scanning road_logs
+    c.execute('''CREATE TABLE IF NOT EXISTS authority_daily_rollup
+                 (authority_id INTEGER NOT NULL REFERENCES authorities(id),
+                  day TEXT NOT NULL,
+                  priority_level TEXT NOT NULL,
+                  report_count INTEGER NOT NULL DEFAULT 0,
+                  open_count INTEGER NOT NULL DEFAULT 0,
+                  severity_sum REAL NOT NULL DEFAULT 0,
+                  severity_max REAL NOT NULL DEFAULT 0,
+                  PRIMARY KEY (authority_id, day, priority_level))''')
+
+    # Registry of monthly archive tables created by archive_logs()
+    c.execute('''CREATE TABLE IF NOT EXISTS archive_partitions
+                 (table_name TEXT PRIMARY KEY,
+                  month TEXT NOT NULL,
+                  row_count INTEGER NOT NULL DEFAULT 0)''')
+
+    version = c.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        _migrate_authorities(c)
+    c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    # Work queue: open incidents per authority, highest severity first.
+    # Partial index so resolved / no-damage rows never bloat the queue.
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_road_logs_work_queue
+                 ON road_logs (authority_id, severity_score DESC, id DESC)
+                 WHERE status = 'open' AND damage_detected = 1''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_road_logs_timestamp ON road_logs (timestamp)")
+
+def _get_or_create_authority(c, name):
+    """Returns the authorities.id for a name, creating the record if needed."""
+    if not name or name == NO_AUTHORITY:
+        return None
+    c.execute("INSERT OR IGNORE INTO authorities (name, created_at) VALUES (?, ?)",
+              (name, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    c.execute("SELECT id FROM authorities WHERE name = ?", (name,))
+    return c.fetchone()[0]
+
+def _bump_rollup(c, authority_id, timestamp, priority, severity, is_open):
+    """Counts one report in the daily rollup and the authority's running totals."""
+    open_count = 1 if is_open else 0
+    severity = severity or 0.0
+    c.execute("""INSERT INTO authority_daily_rollup
+                 (authority_id, day, priority_level, report_count, open_count, severity_sum, severity_max)
+                 VALUES (?, ?, ?, 1, ?, ?, ?)
+                 ON CONFLICT (authority_id, day, priority_level) DO UPDATE SET
+                     report_count = report_count + 1,
+                     open_count = open_count + excluded.open_count,
+                     severity_sum = severity_sum + excluded.severity_sum,
+                     severity_max = MAX(severity_max, excluded.severity_max)""",
+              (authority_id, timestamp[:10], priority, open_count, severity, severity))
+    c.execute("""UPDATE authorities SET
+                     report_count = report_count + 1,
+                     open_count = open_count + ?,
+                     severity_max = MAX(severity_max, ?)
+                 WHERE id = ?""", (open_count, severity, authority_id))
+
+def _migrate_authorities(c):
+    """
+    Schema version 1: adds authority/status columns to databases that predate
+    them, links existing road_logs rows to authority records and builds their
+    rollups and totals. Runs once, inside init_db()'s transaction, as a few
+    set-based statements so large tables are not walked row by row in Python.
+    """
+    columns = {row[1] for row in c.execute("PRAGMA table_info(road_logs)")}
+    if "authority_id" not in columns:
+        c.execute("ALTER TABLE road_logs ADD COLUMN authority_id INTEGER REFERENCES authorities(id)")
+    if "status" not in columns:
+        c.execute("ALTER TABLE road_logs ADD COLUMN status TEXT DEFAULT 'open'")
+
+    # Same routing rule as insert_log(): damage reports with a real authority
+    routable = "damage_detected = 1 AND municipal_authority IS NOT NULL AND municipal_authority NOT IN ('', ?)"
+
+    c.execute(f"""INSERT OR IGNORE INTO authorities (name, created_at)
+                  SELECT DISTINCT municipal_authority, ? FROM road_logs WHERE {routable}""",
+              (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), NO_AUTHORITY))
+    c.execute(f"""UPDATE road_logs
+                  SET authority_id = (SELECT id FROM authorities WHERE name = road_logs.municipal_authority)
+                  WHERE authority_id IS NULL AND {routable}""", (NO_AUTHORITY,))
+    c.execute("""INSERT INTO authority_daily_rollup
+                 (authority_id, day, priority_level, report_count, open_count, severity_sum, severity_max)
+                 SELECT authority_id, substr(timestamp, 1, 10), priority_level, COUNT(*),
+                        SUM(status = 'open'), COALESCE(SUM(severity_score), 0), COALESCE(MAX(severity_score), 0)
+                 FROM road_logs
+                 WHERE authority_id IS NOT NULL
+                 GROUP BY 1, 2, 3""")
+    c.execute("""UPDATE authorities SET
+                     report_count = COALESCE((SELECT SUM(report_count) FROM authority_daily_rollup r WHERE r.authority_id = authorities.id), 0),
+                     open_count = COALESCE((SELECT SUM(open_count) FROM authority_daily_rollup r WHERE r.authority_id = authorities.id), 0),
+                     severity_max = COALESCE((SELECT MAX(severity_max) FROM authority_daily_rollup r WHERE r.authority_id = authorities.id), 0)""")
 
 # Updated function to accept 10 arguments
 def insert_log(source_type, filename, damage_detected, severity, priority, processed_path, lat, lng, address, authority):
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    c.execute("""INSERT INTO road_logs 
-                 (timestamp, source_type, filename, damage_detected, severity_score, priority_level, processed_image_path, latitude, longitude, address, municipal_authority) 
-                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-              (timestamp, source_type, filename, damage_detected, severity, priority, processed_path, lat, lng, address, authority))
+
+    # Only damage reports are routed to an authority's work queue
+    authority_id = _get_or_create_authority(c, authority) if damage_detected else None
+
+    c.execute("""INSERT INTO road_logs
+                 (timestamp, source_type, filename, damage_detected, severity_score, priority_level, processed_image_path, latitude, longitude, address, municipal_authority, authority_id, status)
+                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'open')""",
+              (timestamp, source_type, filename, damage_detected, severity, priority, processed_path, lat, lng, address, authority, authority_id))
+    log_id = c.lastrowid
+
+    if authority_id is not None:
+        _bump_rollup(c, authority_id, timestamp, priority, severity, True)
+
+    # Log row and rollup are committed together
     conn.commit()
     conn.close()
+    return log_id
+
+def resolve_log(log_id):
+    """
+    Marks an incident as resolved and takes it out of the work queue.
+    Returns False if the incident does not exist, is not open, or is not a
+    damage report.
+    """
+    conn = sqlite3.connect(DB_NAME, isolation_level=None)
+    c = conn.cursor()
+    # Write lock up front so concurrent resolves of one incident serialize
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        c.execute("""UPDATE road_logs SET status = 'resolved'
+                     WHERE id = ? AND status = 'open' AND damage_detected = 1""", (log_id,))
+        if c.rowcount == 0:
+            c.execute("ROLLBACK")
+            return False
+
+        c.execute("SELECT authority_id, timestamp, priority_level FROM road_logs WHERE id = ?", (log_id,))
+        authority_id, timestamp, priority = c.fetchone()
+        if authority_id is not None:
+            c.execute("""UPDATE authority_daily_rollup SET open_count = open_count - 1
+                         WHERE authority_id = ? AND day = ? AND priority_level = ?""",
+                      (authority_id, timestamp[:10], priority))
+            c.execute("UPDATE authorities SET open_count = open_count - 1 WHERE id = ?", (authority_id,))
+        c.execute("COMMIT")
+        return True
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def get_authorities():
+    """Lists authorities with their running totals (no rollup scan)."""
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute("""SELECT id, name, report_count, open_count, severity_max
+                 FROM authorities
+                 ORDER BY open_count DESC, name""")
+    rows = [dict(row) for row in c.fetchall()]
+    conn.close()
+    return rows
+
+def get_authority(authority_id):
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute("SELECT id, name FROM authorities WHERE id = ?", (authority_id,))
+    row = c.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def get_work_queue(authority_id, limit=20):
+    """
+    Top-K open incidents for an authority, highest severity first.
+    Served straight from idx_road_logs_work_queue (no sort, no full scan).
+    """
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute("""SELECT id, timestamp, priority_level, severity_score, latitude, longitude, address
+                 FROM road_logs INDEXED BY idx_road_logs_work_queue
+                 WHERE authority_id = ? AND status = 'open' AND damage_detected = 1
+                 ORDER BY severity_score DESC, id DESC
+                 LIMIT ?""", (authority_id, limit))
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+def get_authority_trends(authority_id, days=30):
+    """
+    Daily counts and severity per priority level, read from the rollup table.
+    Covers the last `days` calendar days including today (days=1 is today only).
+    """
+    since = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute("""SELECT day, priority_level, report_count, open_count, severity_sum, severity_max
+                 FROM authority_daily_rollup
+                 WHERE authority_id = ? AND day >= ?
+                 ORDER BY day, priority_level""", (authority_id, since))
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+# Open damage reports are still in a work queue and are never archived
+ARCHIVABLE = "NOT (status = 'open' AND damage_detected = 1)"
+
+# road_logs columns copied into archive partitions, by name (never by position)
+ARCHIVE_COLUMNS = [
+    ("id", "INTEGER PRIMARY KEY"),
+    ("timestamp", "TEXT"),
+    ("source_type", "TEXT"),
+    ("filename", "TEXT"),
+    ("damage_detected", "BOOLEAN"),
+    ("severity_score", "REAL"),
+    ("priority_level", "TEXT"),
+    ("processed_image_path", "TEXT"),
+    ("latitude", "REAL"),
+    ("longitude", "REAL"),
+    ("address", "TEXT"),
+    ("municipal_authority", "TEXT"),
+    ("authority_id", "INTEGER"),
+    ("status", "TEXT"),
+]
+
+def _ensure_archive_table(c, table):
+    columns_sql = ", ".join(f"{name} {col_type}" for name, col_type in ARCHIVE_COLUMNS)
+    c.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns_sql})")
+
+def archive_logs(before_date):
+    """
+    Moves road_logs rows older than before_date (a date or "YYYY-MM-DD") into
+    monthly partition tables (road_logs_archive_YYYY_MM). Open incidents stay in
+    road_logs so they remain in their authority's work queue. Rollups are left
+    untouched so trends still cover archived history. Returns {table_name: rows_moved}.
+    """
+    # Timestamps are compared as text, so the cutoff must be zero-padded ISO
+    if isinstance(before_date, str):
+        before_date = datetime.strptime(before_date, "%Y-%m-%d").date()
+    before_date = before_date.isoformat()
+
+    columns = ", ".join(name for name, _ in ARCHIVE_COLUMNS)
+    conn = sqlite3.connect(DB_NAME, isolation_level=None)
+    c = conn.cursor()
+    # Explicit transaction so partition DDL is rolled back with the row moves
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        c.execute(f"""SELECT DISTINCT substr(timestamp, 1, 7) FROM road_logs
+                      WHERE timestamp < ? AND {ARCHIVABLE}""", (before_date,))
+        # Month strings become table names, so only accept well-formed "YYYY-MM"
+        months = [row[0] for row in c.fetchall() if row[0] and re.fullmatch(r"\d{4}-\d{2}", row[0])]
+
+        moved = {}
+        for month in months:
+            table = f"road_logs_archive_{month.replace('-', '_')}"
+            _ensure_archive_table(c, table)
+            c.execute(f"""INSERT INTO {table} ({columns}) SELECT {columns} FROM road_logs
+                          WHERE timestamp < ? AND substr(timestamp, 1, 7) = ? AND {ARCHIVABLE}""",
+                      (before_date, month))
+            count = c.rowcount
+            c.execute(f"""DELETE FROM road_logs
+                          WHERE timestamp < ? AND substr(timestamp, 1, 7) = ? AND {ARCHIVABLE}""",
+                      (before_date, month))
+            c.execute("""INSERT INTO archive_partitions (table_name, month, row_count) VALUES (?, ?, ?)
+                         ON CONFLICT (table_name) DO UPDATE SET row_count = row_count + excluded.row_count""",
+                      (table, month, count))
+            moved[table] = count
+        c.execute("COMMIT")
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return moved
 
 # Initialize on import
-init_db()
\ No newline at end of file
+init_db()
@@ -0,0 +1,17 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """database module pointed at a fresh SQLite file in tmp_path."""
+    # database.py initializes DB_NAME on import, so import from inside tmp_path
+    monkeypatch.chdir(tmp_path)
+    database = importlib.import_module("database")
+    monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "test.db"))
+    return database
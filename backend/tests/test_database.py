@@ -0,0 +1,163 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+PUNE = "Municipal Corporation of Pune"
+DELHI = "Municipal Corporation of Delhi"
+
+OLD_SCHEMA = '''CREATE TABLE road_logs
+                (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                 timestamp TEXT,
+                 source_type TEXT,
+                 filename TEXT,
+                 damage_detected BOOLEAN,
+                 severity_score REAL,
+                 priority_level TEXT,
+                 processed_image_path TEXT,
+                 latitude REAL,
+                 longitude REAL,
+                 address TEXT,
+                 municipal_authority TEXT)'''
+
+def report(db, severity, authority=PUNE, priority="High", damage=True):
+    return db.insert_log("API Upload", "road.jpg", damage, severity, priority, "",
+                         18.5, 73.8, "Some Road", authority if damage else "N/A")
+
+def set_timestamp(db, log_id, timestamp):
+    conn = sqlite3.connect(db.DB_NAME)
+    conn.execute("UPDATE road_logs SET timestamp = ? WHERE id = ?", (timestamp, log_id))
+    conn.commit()
+    conn.close()
+
+def query(db, sql, params=()):
+    conn = sqlite3.connect(db.DB_NAME)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+def totals(db):
+    return {row["name"]: (row["report_count"], row["open_count"], row["severity_max"])
+            for row in db.get_authorities()}
+
+def authority_id(db, name):
+    return next(row["id"] for row in db.get_authorities() if row["name"] == name)
+
+def rollup_sums(db, auth_id):
+    return query(db, """SELECT SUM(report_count), SUM(open_count) FROM authority_daily_rollup
+                        WHERE authority_id = ?""", (auth_id,))[0]
+
+def test_migrates_and_backfills_old_schema(db):
+    conn = sqlite3.connect(db.DB_NAME)
+    conn.execute(OLD_SCHEMA)
+    conn.executemany("""INSERT INTO road_logs (timestamp, damage_detected, severity_score, priority_level, municipal_authority)
+                        VALUES (?, ?, ?, ?, ?)""",
+                     [("2024-01-05 10:00:00", 1, 0.2, "Critical", PUNE),
+                      ("2024-01-05 11:00:00", 1, 0.05, "High", PUNE),
+                      ("2024-01-06 09:00:00", 0, 0.0, "Safe", "N/A"),
+                      ("2024-01-06 10:00:00", 1, 0.4, "Critical", None),
+                      ("2024-01-06 11:00:00", 1, 0.3, "Critical", "N/A"),
+                      ("2024-01-07 08:00:00", 1, 0.1, "High", DELHI)])
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+
+    assert query(db, "PRAGMA user_version")[0][0] == db.SCHEMA_VERSION
+    pune_id = authority_id(db, PUNE)
+    delhi_id = authority_id(db, DELHI)
+    # Damage rows without a real authority (NULL / "N/A") stay unlinked
+    assert query(db, "SELECT id, authority_id, status FROM road_logs ORDER BY id") == [
+        (1, pune_id, "open"), (2, pune_id, "open"), (3, None, "open"),
+        (4, None, "open"), (5, None, "open"), (6, delhi_id, "open")]
+    assert totals(db) == {PUNE: (2, 2, 0.2), DELHI: (1, 1, 0.1)}
+    assert query(db, """SELECT authority_id, day, priority_level, report_count, open_count, severity_sum, severity_max
+                        FROM authority_daily_rollup ORDER BY day, priority_level""") == [
+        (pune_id, "2024-01-05", "Critical", 1, 1, 0.2, 0.2),
+        (pune_id, "2024-01-05", "High", 1, 1, 0.05, 0.05),
+        (delhi_id, "2024-01-07", "High", 1, 1, 0.1, 0.1)]
+
+    # Migration is applied once; re-initializing must not count rows again
+    db.init_db()
+    assert totals(db) == {PUNE: (2, 2, 0.2), DELHI: (1, 1, 0.1)}
+    assert rollup_sums(db, pune_id) == (2, 2)
+
+def test_rollups_follow_insert_and_resolve(db):
+    db.init_db()
+    first = report(db, 0.3, priority="Critical")
+    second = report(db, 0.05)
+    report(db, 0.5, authority=DELHI)
+    safe = report(db, 0.0, priority="Safe", damage=False)
+
+    assert totals(db) == {PUNE: (2, 2, 0.3), DELHI: (1, 1, 0.5)}
+
+    assert db.resolve_log(first) is True
+    assert db.resolve_log(first) is False
+    assert db.resolve_log(safe) is False
+    assert db.resolve_log(9999) is False
+
+    assert totals(db) == {PUNE: (2, 1, 0.3), DELHI: (1, 1, 0.5)}
+    pune_id = authority_id(db, PUNE)
+    assert rollup_sums(db, pune_id) == (2, 1)
+    assert [row["id"] for row in db.get_work_queue(pune_id)] == [second]
+
+    trends = db.get_authority_trends(pune_id)
+    assert {row["priority_level"]: (row["report_count"], row["open_count"]) for row in trends} == {
+        "Critical": (1, 0), "High": (1, 1)}
+
+def test_trends_window_covers_exactly_the_requested_days(db):
+    db.init_db()
+    today = datetime.now()
+    for offset, priority in [(0, "Critical"), (1, "High"), (2, "Medium")]:
+        report(db, 0.1, priority=priority)
+        day = (today - timedelta(days=offset)).strftime("%Y-%m-%d")
+        conn = sqlite3.connect(db.DB_NAME)
+        conn.execute("UPDATE authority_daily_rollup SET day = ? WHERE priority_level = ?", (day, priority))
+        conn.commit()
+        conn.close()
+    pune_id = authority_id(db, PUNE)
+
+    assert [row["priority_level"] for row in db.get_authority_trends(pune_id, days=1)] == ["Critical"]
+    assert {row["priority_level"] for row in db.get_authority_trends(pune_id, days=2)} == {"Critical", "High"}
+    assert len(db.get_authority_trends(pune_id, days=3)) == 3
+
+def test_work_queue_orders_by_severity_and_limits(db):
+    db.init_db()
+    low = report(db, 0.01)
+    high = report(db, 0.4)
+    mid = report(db, 0.1)
+    tie = report(db, 0.1)
+    report(db, 0.9, authority=DELHI)
+    resolved = report(db, 0.8)
+    db.resolve_log(resolved)
+
+    assert [row["id"] for row in db.get_work_queue(1, limit=10)] == [high, tie, mid, low]
+    assert [row["id"] for row in db.get_work_queue(1, limit=2)] == [high, tie]
+
+@pytest.mark.parametrize("cutoff", ["2024-01-05", "2024-1-5"])
+def test_archive_respects_cutoff_and_keeps_open_incidents(db, cutoff):
+    db.init_db()
+    before_resolved = report(db, 0.2)
+    before_safe = report(db, 0.0, priority="Safe", damage=False)
+    before_open = report(db, 0.3)
+    on_cutoff = report(db, 0.0, priority="Safe", damage=False)
+    later = report(db, 0.0, priority="Safe", damage=False)
+    db.resolve_log(before_resolved)
+    set_timestamp(db, before_resolved, "2023-12-20 08:00:00")
+    set_timestamp(db, before_safe, "2024-01-04 23:59:59")
+    set_timestamp(db, before_open, "2024-01-01 12:00:00")
+    set_timestamp(db, on_cutoff, "2024-01-05 00:00:00")
+    set_timestamp(db, later, "2024-02-10 12:00:00")
+
+    moved = db.archive_logs(cutoff)
+
+    assert moved == {"road_logs_archive_2023_12": 1, "road_logs_archive_2024_01": 1}
+    assert [row[0] for row in query(db, "SELECT id FROM road_logs ORDER BY id")] == [
+        before_open, on_cutoff, later]
+    assert query(db, "SELECT id, status FROM road_logs_archive_2023_12") == [(before_resolved, "resolved")]
+    assert query(db, "SELECT id, municipal_authority FROM road_logs_archive_2024_01") == [(before_safe, "N/A")]
+    assert [row["id"] for row in db.get_work_queue(1)] == [before_open]
+
+    # Nothing left to move, and rollups keep the archived history
+    assert db.archive_logs(cutoff) == {}
+    assert totals(db) == {PUNE: (2, 1, 0.3)}